@@ -1,73 +1,209 @@
 import dash
-from dash import dcc, html, Input, Output, State
+from dash import dcc, html, ClientsideFunction, DiskcacheManager, Input, Output, Patch, State
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
-from pysolar.solar import get_altitude, get_azimuth
+import plotly.io as pio
+from datetime import datetime, timedelta, timezone
+import diskcache
+from flask_caching import Cache
+import numpy as np
+import pandas as pd
 from timezonefinder import TimezoneFinder
 import pytz
+from geopy.exc import GeocoderServiceError
+from geopy.extra.rate_limiter import RateLimiter
 from geopy.geocoders import Nominatim
 import os
 
+import solar_kernels
+from solar_kernels import altitudes_over_day, detect_crossings, positions, UNIX_EPOCH_JD
+
+# orjson is several times faster than stdlib json for figure payloads and
+# serialises NumPy arrays natively; every figure uses the same template
+pio.json.config.default_engine = "orjson"
+pio.templates.default = "plotly_white"
+
+# Pay the Numba load/compile cost at startup rather than on the first submit
+solar_kernels.warm_up()
+
 app = dash.Dash(__name__)
 app.title = "Solar Dashboard"
 
+# Whole-dashboard results per location, shared by every worker process
+cache = Cache(app.server, config={"CACHE_TYPE": "FileSystemCache", "CACHE_DIR": ".dash-cache"})
+
+# Geocoding and solar maths run as background jobs so a slow Nominatim
+# response doesn't tie up a web worker; the browser polls for the result.
+# Every job is a fresh forked process, so anything worth caching goes
+# through `cache` or `geo_cache` on disk, not an in-process lru_cache.
+background_callback_manager = DiskcacheManager(diskcache.Cache(".dash-jobs"))
+
+# Geocoding and timezone lookups never change for a given input, so memoize
+# them on disk, where every background job and restart can see them
+geo_cache = diskcache.Cache(".geocache")
+GEO_CACHE_EXPIRE = 30 * 24 * 3600
+
+# Loading the timezone polygons is expensive; do it once per process
+timezone_finder = TimezoneFinder(in_memory=True)
+
+# One geocoder for the whole process: its requests session (geopy's default
+# adapter) keeps the TCP/TLS connection to Nominatim alive between queries.
+# Background jobs fork with an empty pool, so that only spans the fallback
+# queries of one lookup, not separate submits.
+geolocator = Nominatim(user_agent="solar-dashboard-app", timeout=5)
+# Nominatim's usage policy allows at most 1 request/second. Each background
+# job is its own process, so the spacing is kept in geo_cache where every job
+# sees it; RateLimiter adds the retries on top
+throttled_geocode = diskcache.throttle(geo_cache, 1, 1.05, name="nominatim-requests")(geolocator.geocode)
+geocode = RateLimiter(
+    throttled_geocode,
+    max_retries=2,
+    error_wait_seconds=2.0,
+    swallow_exceptions=False
+)
+
 solar_events = {
     "Spring Equinox": "2025-03-20",
     "Summer Solstice": "2025-06-20",
     "Fall Equinox": "2025-09-22",
     "Winter Solstice": "2025-12-21"
 }
+# Local noon of each event, parsed once rather than per timezone
+solar_event_noons = {
+    label: datetime.strptime(date_str, "%Y-%m-%d") + timedelta(hours=12)
+    for label, date_str in solar_events.items()
+}
 
 # Geolocation helpers
 # TODO: Integrate autocomplete with Google Places or Mapbox
-def get_coordinates(location_text):
-    geolocator = Nominatim(user_agent="solar-dashboard-app")
-    location_text = location_text.strip().title()
+def normalize_location(location_text):
+    # "  tokyo ,japan " and "Tokyo, Japan" should share one cache entry
+    parts = (" ".join(part.split()) for part in location_text.split(","))
+    return ", ".join(part for part in parts if part).title()
+
 
+def get_coordinates(location_text):
     try:
-        # Try full input
-        location = geolocator.geocode(location_text, exactly_one=True, timeout=10)
-        if location:
-            print(f"Found location: {location.address}")
-            return location.latitude, location.longitude, location.address
+        return _lookup_coordinates(normalize_location(location_text))
+    except GeocoderServiceError as e:
+        # timeouts, outages and rate limiting; anything else is a bug and should surface
+        print(f"Geocoding error: {e}")
+        return None
 
-        # Fallback: just the city name
-        city_only = location_text.split(",")[0]
-        location = geolocator.geocode(city_only, exactly_one=True, timeout=10)
-        if location:
-            print(f"Fallback location: {location.address}")
-            return location.latitude, location.longitude, location.address
 
+@geo_cache.memoize(expire=GEO_CACHE_EXPIRE)
+def _lookup_coordinates(location_text):
+    city_only = location_text.split(",")[0]
+    attempts = {}
+    for query, label in (
+        # Try full input
+        (location_text, "Found location"),
+        # Fallback: just the city name
+        (city_only, "Fallback location"),
         # Fallback: guess country
-        location = geolocator.geocode(f"{city_only}, United States", exactly_one=True, timeout=10)
+        (f"{city_only}, United States", "Guessed country fallback"),
+    ):
+        attempts.setdefault(query, label)
+
+    # A fallback is only sent once the better query before it has missed
+    for query, label in attempts.items():
+        location = geocode(query, exactly_one=True)
         if location:
-            print(f"Guessed country fallback: {location.address}")
+            print(f"{label}: {location.address}")
             return location.latitude, location.longitude, location.address
 
-    except Exception as e:
-        print(f"Geocoding error: {e}")
-        return None
-
     return None
 
 
 def get_local_timezone(lat, lon):
-    tf = TimezoneFinder()
-    tz_name = tf.timezone_at(lat=lat, lng=lon)
-    return pytz.timezone(tz_name) if tz_name else pytz.utc
-
-def find_sunrise_sunset(lat, lon, date, tz):
-    sunrise = None
-    sunset = None
-    for minute in range(0, 1440):
-        dt_local = tz.localize(datetime.combine(date, datetime.min.time()) + timedelta(minutes=minute))
-        dt_utc = dt_local.astimezone(pytz.utc)
-        altitude = get_altitude(lat, lon, dt_utc)
-        if altitude > 0 and sunrise is None:
-            sunrise = dt_local
-        if altitude < 0 and sunrise and sunset is None:
-            sunset = dt_local
-    return sunrise, sunset
+    # Timezone boundaries don't move; a 0.01° grid is plenty for cache keys
+    return pytz.timezone(_lookup_timezone_name(round(lat, 2), round(lon, 2)) or "UTC")
+
+
+@geo_cache.memoize(expire=GEO_CACHE_EXPIRE)
+def _lookup_timezone_name(lat, lon):
+    return timezone_finder.timezone_at(lat=lat, lng=lon)
+
+
+def julian_days(when_utc):
+    return when_utc.astype("datetime64[s]").astype(np.float64) / 86400.0 + UNIX_EPOCH_JD
+
+def solar_altitudes(lat, lon, when_utc):
+    # when_utc: naive-UTC datetime64 array
+    return altitudes_over_day(lat, lon, julian_days(when_utc))
+
+def solar_positions(lat, lon, when_utc):
+    # -> (azimuths, altitudes) for a naive-UTC datetime64 array
+    return positions(lat, lon, julian_days(when_utc))
+
+# Sunrise/sunset search grid: coarse samples every half hour (plus the last
+# minute of the day) to bracket each crossing, then the 30 minutes of the
+# bracketing interval at 1-minute resolution. A dip below the horizon shorter
+# than the coarse step (polar grazing days) can be missed.
+COARSE_MINUTES = np.r_[np.arange(0, 1440, 30), 1439]
+REFINE_MINUTES = np.arange(1, 31)
+
+# Wall-clock offsets of the yesterday graph's samples from local midnight
+QUARTER_HOUR_OFFSETS = np.arange(96) * np.timedelta64(15, "m")
+
+def _day_altitudes(lat, lon, jd0, minutes):
+    # jd0: (days,), minutes: (days, n) or (n,) -> altitudes of shape (days, n)
+    jd = (jd0[:, None] + minutes / 1440.0).ravel()
+    return altitudes_over_day(lat, lon, jd).reshape(len(jd0), -1)
+
+def find_sunrise_sunset(lat, lon, dates, tz):
+    midnights_utc = [tz.localize(datetime.combine(date, datetime.min.time())).astimezone(timezone.utc) for date in dates]
+    jd0 = np.array([m.timestamp() for m in midnights_utc]) / 86400.0 + UNIX_EPOCH_JD
+
+    coarse = detect_crossings(_day_altitudes(lat, lon, jd0, COARSE_MINUTES))
+    rise_idx, set_idx = coarse[:, 0], coarse[:, 1]
+
+    # Refine both brackets in a single kernel call
+    rise_window = np.minimum(COARSE_MINUTES[np.maximum(rise_idx - 1, 0)][:, None] + REFINE_MINUTES, 1439)
+    set_window = np.minimum(COARSE_MINUTES[np.maximum(set_idx - 1, 0)][:, None] + REFINE_MINUTES, 1439)
+    fine = _day_altitudes(lat, lon, jd0, np.hstack([rise_window, set_window]))
+    rows = np.arange(len(dates))
+    rise = np.where(rise_idx == 0, 0, rise_window[rows, detect_crossings(fine[:, :len(REFINE_MINUTES)])[:, 0]])
+    # first sample below the horizon == first "above" sample of the negated altitudes
+    set_ = set_window[rows, detect_crossings(-fine[:, len(REFINE_MINUTES):])[:, 0]]
+
+    results = []
+    for i, midnight_utc in enumerate(midnights_utc):
+        sunrise = (midnight_utc + timedelta(minutes=int(rise[i]))).astimezone(tz) if rise_idx[i] >= 0 else None
+        sunset = (midnight_utc + timedelta(minutes=int(set_[i]))).astimezone(tz) if set_idx[i] >= 0 else None
+        results.append((sunrise, sunset))
+    return results
+
+def calendar_list_items(tz_name):
+    tz = pytz.timezone(tz_name)
+    calendar_items = []
+    for label, noon in solar_event_noons.items():
+        dt_local = tz.localize(noon)
+        formatted = dt_local.strftime("%B %d, %Y at %I:%M %p %Z")
+        calendar_items.append(html.Li(f"{label}: {formatted}", style={"marginBottom": "10px", "fontSize": "18px"}))
+    return calendar_items
+
+SEASON_NOONS = {
+    "Spring": datetime(2025, 3, 20, 12),
+    "Summer": datetime(2025, 6, 20, 12),
+    "Fall": datetime(2025, 9, 22, 12),
+    "Winter": datetime(2025, 12, 21, 12)
+}
+
+# Only the bar heights and labels depend on the location, so the figure is
+# shipped once with the layout and each submit sends a Patch of those values
+def sunrise_sunset_skeleton():
+    fig = go.Figure()
+    for name in SEASON_NOONS:
+        fig.add_trace(go.Bar(x=[name], y=[0], name="Sunrise", marker_color="orange", textposition="outside"))
+        fig.add_trace(go.Bar(x=[name], y=[0], name="Sunset", marker_color="blue", textposition="outside"))
+    fig.update_layout(
+        title="Sunrise and Sunset Times by Season",
+        yaxis_title="Hour (Local Time)",
+        legend=dict(itemsizing="constant", traceorder="normal")
+    )
+    return fig
+
+SUNRISE_SUNSET_FIGURE = sunrise_sunset_skeleton()
 
 # Layout
 app.layout = html.Div(style={"backgroundColor": "#fdf6e3", "fontFamily": "Segoe UI"}, children=[
@@ -85,12 +221,14 @@ app.layout = html.Div(style={"backgroundColor": "#fdf6e3", "fontFamily": "Segoe
         html.Button("Submit", id="submit-location", n_clicks=0)
     ], style={"padding": "10px"}),
 
-    html.Div(id="location-status", style={"color": "#e74c3c", "marginBottom": "10px"}),
+    html.Div("Please enter a city and country.", id="location-status", style={"color": "#e74c3c", "marginBottom": "10px"}),
+    dcc.Store(id="solar-cache"),
+    dcc.Store(id="figure-template", data=pio.templates[pio.templates.default].to_plotly_json()),
 
     dcc.Tabs([
         dcc.Tab(label="Seasonal Solar Altitude", children=[
             dcc.Graph(id="seasonal-graph"),
-            dcc.Graph(id="sunrise-sunset-graph")
+            dcc.Graph(id="sunrise-sunset-graph", figure=SUNRISE_SUNSET_FIGURE)
         ]),
         dcc.Tab(label="Yesterday's Solar Altitude", children=[dcc.Graph(id="yesterday-graph")]),
         dcc.Tab(label="Sun Direction & Location", children=[html.Div(id="sun-info")]),
@@ -115,128 +253,98 @@ app.layout = html.Div(style={"backgroundColor": "#fdf6e3", "fontFamily": "Segoe
     ])
 ])
 
-@app.callback(
-    Output("location-status", "children"),
-    Output("seasonal-graph", "figure"),
-    Output("sunrise-sunset-graph", "figure"),
-    Output("yesterday-graph", "figure"),
-    Output("sun-info", "children"),
-    Output("calendar-list", "children"),
-    Input("submit-location", "n_clicks"),
-    State("location-input", "value")
-)
-def update_dashboard(n_clicks, location_text):
+# Seasonal values only depend on the location (the season dates are fixed),
+# so they live in the shared cache for good, per ~100 m grid cell
+@cache.memoize(timeout=0)
+def seasonal_summary(lat, lon):
+    local_tz = get_local_timezone(lat, lon)
+    season_sun_times = find_sunrise_sunset(lat, lon, [dt.date() for dt in SEASON_NOONS.values()], local_tz)
+    noons_utc = np.array(
+        [local_tz.localize(dt).astimezone(timezone.utc).replace(tzinfo=None) for dt in SEASON_NOONS.values()],
+        dtype="datetime64[s]"
+    )
+    season_altitudes = solar_altitudes(lat, lon, noons_utc)
+
+    # (hour, label) per bar, in SUNRISE_SUNSET_FIGURE trace order
+    sun_bars = []
+    for sunrise_dt, sunset_dt in season_sun_times:
+        for event_dt in (sunrise_dt, sunset_dt):
+            sun_bars.append((
+                event_dt.hour + event_dt.minute / 60 if event_dt else 0,
+                event_dt.strftime("%H:%M") if event_dt else "N/A"
+            ))
+
+    return tuple(SEASON_NOONS), tuple(season_altitudes.tolist()), tuple(sun_bars)
+
+# Yesterday's curve is the same for everyone who asks about a place today, so
+# it lives in the shared cache on a ~1 km grid; a day's timeout covers the
+# date rolling over
+@cache.memoize(timeout=86400)
+def yesterday_series(lat, lon, yesterday):
+    local_tz = get_local_timezone(lat, lon)
+    times = pd.DatetimeIndex(np.datetime64(yesterday, "m") + QUARTER_HOUR_OFFSETS)
+    # Localise the whole wall-clock grid at once so a DST change part-way
+    # through the day is honoured; repeated slots take standard time, the way
+    # pytz's localize(is_dst=False) does
+    times_utc = times.tz_localize(local_tz.zone, ambiguous=False, nonexistent="NaT").tz_convert(None).to_numpy(copy=True)
+    # DST gaps aren't always an hour (Lord Howe's is 30 minutes), so the few
+    # slots that fall in one are resolved by pytz itself
+    gap = np.isnat(times_utc)
+    times_utc[gap] = [local_tz.localize(t).astimezone(timezone.utc).replace(tzinfo=None) for t in times[gap].to_pydatetime()]
+    altitudes = solar_altitudes(lat, lon, times_utc)
+    return tuple(times.strftime("%Y-%m-%dT%H:%M").tolist()), tuple(altitudes.tolist())
+
+def build_dashboard(location_text):
     if not location_text:
-        return "Please enter a city and country.", go.Figure(), go.Figure(), go.Figure(), "", []
+        return "Please enter a city and country.", None, SUNRISE_SUNSET_FIGURE, "", []
 
+    # Geocoding has its own disk cache, so spelling variants of a place meet
+    # here on the same coordinates; failures are never memoized below
     coords = get_coordinates(location_text)
     if not coords:
-        return f"Could not find location: {location_text}", go.Figure(), go.Figure(), go.Figure(), "", []
+        return f"Could not find location: {location_text}", None, SUNRISE_SUNSET_FIGURE, "", []
 
     lat, lon, full_address = coords
     local_tz = get_local_timezone(lat, lon)
+    return location_dashboard(lat, lon, full_address, datetime.now(local_tz).date())
 
-    seasons = {
-        "Spring": datetime(2025, 3, 20, 12),
-        "Summer": datetime(2025, 6, 20, 12),
-        "Fall": datetime(2025, 9, 22, 12),
-        "Winter": datetime(2025, 12, 21, 12)
-    }
-
-    seasonal_fig = go.Figure()
-    sunrise_sunset_fig = go.Figure()
-    season_colors = {
-        "Spring": "#2ecc71",
-        "Summer": "#f1c40f",
-        "Fall": "#e67e22",
-        "Winter": "#3498db"
-    }
-
-    for name, dt_local in seasons.items():
-        dt_localized = local_tz.localize(dt_local)
-        dt_utc = dt_localized.astimezone(pytz.utc)
-        altitude = get_altitude(lat, lon, dt_utc)
-
-        sunrise_dt, sunset_dt = find_sunrise_sunset(lat, lon, dt_local.date(), local_tz)
-        sunrise_hour = sunrise_dt.strftime("%H:%M") if sunrise_dt else "N/A"
-        sunset_hour = sunset_dt.strftime("%H:%M") if sunset_dt else "N/A"
-
-        seasonal_fig.add_trace(go.Bar(
-            x=[name],
-            y=[altitude],
-            name=name,
-            marker_color=season_colors[name],
-            text=f"{altitude:.2f}°",
-            textposition="outside"
-        ))
-
-        sunrise_sunset_fig.add_trace(go.Bar(
-            x=[name],
-            y=[sunrise_dt.hour + sunrise_dt.minute / 60 if sunrise_dt else 0],
-            name="Sunrise",
-            marker_color="orange",
-            text=sunrise_hour,
-            textposition="outside"
-        ))
-        sunrise_sunset_fig.add_trace(go.Bar(
-            x=[name],
-            y=[sunset_dt.hour + sunset_dt.minute / 60 if sunset_dt else 0],
-            name="Sunset",
-            marker_color="blue",
-            text=sunset_hour,
-            textposition="outside"
-        ))
-
-    seasonal_fig.add_shape(
-        type="line",
-        x0=-0.5, x1=3.5,
-        y0=45, y1=45,
-        line=dict(color="gray", dash="dash")
-    )
-    seasonal_fig.update_layout(
-        title=f"Solar Noon Altitude by Season ({full_address})",
-        yaxis_title="Altitude (°)",
-        template="plotly_white",
-        showlegend=False,
-        height=600,
-        annotations=[
-            dict(
-                x=1.5,
-                y=45,
-                xref="x",
-                yref="y",
-                text="45° Reference Altitude",
-                showarrow=False,
-                font=dict(color="gray", size=12)
-            )
-        ]
-    )
+# Keyed on the local date too, so "yesterday" and today's noon roll over at
+# the location's midnight instead of up to a timeout later
+@cache.memoize(timeout=600)
+def location_dashboard(lat, lon, full_address, today):
+    local_tz = get_local_timezone(lat, lon)
 
-    sunrise_sunset_fig.update_layout(
-        title="Sunrise and Sunset Times by Season",
-        yaxis_title="Hour (Local Time)",
-        template="plotly_white",
-        legend=dict(itemsizing="constant", traceorder="normal")
-    )
+    lat_q, lon_q = round(lat, 3), round(lon, 3)
+    season_names, season_altitudes, sun_bars = seasonal_summary(lat_q, lon_q)
+    sunrise_sunset_patch = Patch()
+    for i, (hour, label) in enumerate(sun_bars):
+        sunrise_sunset_patch["data"][i]["y"] = [hour]
+        sunrise_sunset_patch["data"][i]["text"] = label
 
     # Yesterday's Solar Altitude
-    yesterday = datetime.now(local_tz).date() - timedelta(days=1)
-    times = [local_tz.localize(datetime.combine(yesterday, datetime.min.time()) + timedelta(minutes=15 * i)) for i in range(96)]
-    altitudes = [get_altitude(lat, lon, t.astimezone(pytz.utc)) for t in times]
-    yesterday_fig = go.Figure()
-    yesterday_fig.add_trace(go.Scatter(x=times, y=altitudes, mode="lines", name="Altitude"))
-    yesterday_fig.update_layout(
-        title=f"Solar Altitude on {yesterday.strftime('%B %d, %Y')} ({full_address})",
-        xaxis_title="Time (Local)",
-        yaxis_title="Altitude (°)",
-        template="plotly_white"
-    )
+    yesterday = today - timedelta(days=1)
+    times, altitudes = yesterday_series(round(lat, 2), round(lon, 2), yesterday)
+
+    # The seasonal and yesterday figures are drawn in the browser from this
+    # payload by solar.buildFigs (assets/solar.js)
+    solar_data = {
+        "seasonal": {
+            "title": f"Solar Noon Altitude by Season ({full_address})",
+            "seasons": season_names,
+            "altitudes": season_altitudes
+        },
+        "yesterday": {
+            "title": f"Solar Altitude on {yesterday.strftime('%B %d, %Y')} ({full_address})",
+            "times": times,
+            "altitudes": altitudes
+        }
+    }
 
     # Sun Info
-    noon = local_tz.localize(datetime.combine(datetime.now(local_tz).date(), datetime.min.time()) + timedelta(hours=12))
-    noon_utc = noon.astimezone(pytz.utc)
-    altitude_now = get_altitude(lat, lon, noon_utc)
-    azimuth_now = get_azimuth(lat, lon, noon_utc)
+    noon = local_tz.localize(datetime.combine(today, datetime.min.time()) + timedelta(hours=12))
+    noon_utc = np.array([noon.astimezone(timezone.utc).replace(tzinfo=None)], dtype="datetime64[s]")
+    azimuths, altitudes_now = solar_positions(lat, lon, noon_utc)
+    altitude_now, azimuth_now = altitudes_now[0], azimuths[0]
     sun_info = html.Div([
         html.H4("Sun Direction & Location", style={"color": "#e67e22"}),
         html.P(f"Location: {full_address}"),
@@ -246,14 +354,36 @@ def update_dashboard(n_clicks, location_text):
     ])
 
     # Solar Calendar with time of day
-    calendar_items = []
-    for label, date_str in solar_events.items():
-        dt = datetime.strptime(date_str, "%Y-%m-%d")
-        dt_local = local_tz.localize(datetime.combine(dt.date(), datetime.min.time()) + timedelta(hours=12))
-        formatted = dt_local.strftime("%B %d, %Y at %I:%M %p %Z")
-        calendar_items.append(html.Li(f"{label}: {formatted}", style={"marginBottom": "10px", "fontSize": "18px"}))
+    calendar_items = calendar_list_items(local_tz.zone)
+
+    return "", solar_data, sunrise_sunset_patch, sun_info, calendar_items
 
-    return "", seasonal_fig, sunrise_sunset_fig, yesterday_fig, sun_info, calendar_items
+@app.callback(
+    Output("location-status", "children"),
+    Output("solar-cache", "data"),
+    Output("sunrise-sunset-graph", "figure"),
+    Output("sun-info", "children"),
+    Output("calendar-list", "children"),
+    Input("submit-location", "n_clicks"),
+    State("location-input", "value"),
+    # The initial prompt is in the layout, so a page load doesn't fork a job
+    prevent_initial_call=True,
+    background=True,
+    manager=background_callback_manager,
+    running=[(Output("submit-location", "disabled"), True, False)]
+)
+def update_dashboard(n_clicks, location_text):
+    return build_dashboard(location_text)
+
+# Plotly.js can't resolve template names, so the default template is shipped
+# once with the layout and applied in the browser
+app.clientside_callback(
+    ClientsideFunction(namespace="solar", function_name="buildFigs"),
+    Output("seasonal-graph", "figure"),
+    Output("yesterday-graph", "figure"),
+    Input("solar-cache", "data"),
+    State("figure-template", "data")
+)
 
 # Run app
 if __name__ == "__main__":
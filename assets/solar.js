@@ -0,0 +1,68 @@
+// Builds the seasonal and yesterday figures from the solar-cache payload so
+// the server only ships the numbers.
+var SEASON_COLORS = {
+    Spring: "#2ecc71",
+    Summer: "#f1c40f",
+    Fall: "#e67e22",
+    Winter: "#3498db"
+};
+
+function seasonalFigure(seasonal, template) {
+    // one trace for all four seasons, coloured per bar
+    var data = [{
+        type: "bar",
+        x: seasonal.seasons,
+        y: seasonal.altitudes,
+        marker: {color: seasonal.seasons.map(function(name) { return SEASON_COLORS[name]; })},
+        text: seasonal.altitudes.map(function(altitude) { return altitude.toFixed(2) + "°"; }),
+        textposition: "outside"
+    }];
+    return {
+        data: data,
+        layout: {
+            template: template,
+            title: {text: seasonal.title},
+            yaxis: {title: {text: "Altitude (°)"}},
+            showlegend: false,
+            height: 600,
+            shapes: [{
+                type: "line",
+                x0: -0.5, x1: 3.5,
+                y0: 45, y1: 45,
+                line: {color: "gray", dash: "dash"}
+            }],
+            annotations: [{
+                x: 1.5,
+                y: 45,
+                xref: "x",
+                yref: "y",
+                text: "45° Reference Altitude",
+                showarrow: false,
+                font: {color: "gray", size: 12}
+            }]
+        }
+    };
+}
+
+function yesterdayFigure(yesterday, template) {
+    return {
+        data: [{type: "scattergl", mode: "lines", name: "Altitude", x: yesterday.times, y: yesterday.altitudes}],
+        layout: {
+            template: template,
+            title: {text: yesterday.title},
+            xaxis: {title: {text: "Time (Local)"}},
+            yaxis: {title: {text: "Altitude (°)"}}
+        }
+    };
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    solar: {
+        buildFigs: function(data, template) {
+            if (!data) {
+                return [{data: [], layout: {template: template}}, {data: [], layout: {template: template}}];
+            }
+            return [seasonalFigure(data.seasonal, template), yesterdayFigure(data.yesterday, template)];
+        }
+    }
+});
@@ -0,0 +1,88 @@
+import numpy as np
+from numba import njit
+
+# Refraction constants from pysolar.constants / get_refraction_correction
+STANDARD_PRESSURE = 101325.00
+STANDARD_TEMPERATURE = 288.15
+SUN_RADIUS = 0.26667
+ATMOS_REFRACT = 0.5667
+
+UNIX_EPOCH_JD = 2440587.5
+J2000_JD = 2451545.0
+
+
+@njit(fastmath=True, cache=True)
+def _altitude_azimuth(lat_rad, lon, jd):
+    # Astronomical Almanac low-precision solar coordinates (~0.01° for
+    # 1950-2050) plus the refraction correction applied by pysolar's get_altitude
+    n = jd - J2000_JD
+    mean_longitude = (280.460 + 0.9856474 * n) % 360.0
+    mean_anomaly = np.radians((357.528 + 0.9856003 * n) % 360.0)
+    ecliptic_longitude = np.radians(mean_longitude + 1.915 * np.sin(mean_anomaly) + 0.020 * np.sin(2 * mean_anomaly))
+    obliquity = np.radians(23.439 - 0.0000004 * n)
+
+    right_ascension = np.arctan2(np.cos(obliquity) * np.sin(ecliptic_longitude), np.cos(ecliptic_longitude))
+    declination = np.arcsin(np.sin(obliquity) * np.sin(ecliptic_longitude))
+    sidereal_time = np.radians((280.46061837 + 360.98564736629 * n + lon) % 360.0)
+    hour_angle = sidereal_time - right_ascension
+
+    altitude = np.degrees(np.arcsin(
+        np.sin(lat_rad) * np.sin(declination) + np.cos(lat_rad) * np.cos(declination) * np.cos(hour_angle)
+    ))
+    # degrees clockwise from north, like pysolar's get_azimuth
+    azimuth = (np.degrees(np.arctan2(
+        np.sin(hour_angle), np.cos(hour_angle) * np.sin(lat_rad) - np.tan(declination) * np.cos(lat_rad)
+    )) + 180.0) % 360.0
+
+    if altitude >= -(SUN_RADIUS + ATMOS_REFRACT):
+        pressure_term = STANDARD_PRESSURE * 2.830 * 1.02
+        temperature_term = 1010.0 * STANDARD_TEMPERATURE * 60.0 * np.tan(np.radians(altitude + (10.3 / (altitude + 5.11))))
+        altitude += pressure_term / temperature_term
+    return altitude, azimuth
+
+
+# The kernels below run on at most a few hundred samples per call, where
+# numba's parallel thread pool costs more than it saves. Staying serial also
+# keeps the pool from starting before background callbacks fork
+@njit(fastmath=True, cache=True)
+def altitudes_over_day(lat, lon, jd_array):
+    out = np.empty(jd_array.shape[0])
+    lat_rad = np.radians(lat)
+    for i in range(jd_array.shape[0]):
+        out[i] = _altitude_azimuth(lat_rad, lon, jd_array[i])[0]
+    return out
+
+
+@njit(fastmath=True, cache=True)
+def positions(lat, lon, jd_array):
+    # -> (azimuths, altitudes)
+    azimuths = np.empty(jd_array.shape[0])
+    altitudes = np.empty(jd_array.shape[0])
+    lat_rad = np.radians(lat)
+    for i in range(jd_array.shape[0]):
+        altitudes[i], azimuths[i] = _altitude_azimuth(lat_rad, lon, jd_array[i])
+    return azimuths, altitudes
+
+
+@njit(cache=True)
+def detect_crossings(alt_2d):
+    # Per row (day): index of the first sample above the horizon and of the
+    # first sample below it after that; -1 where there is no crossing
+    out = np.full((alt_2d.shape[0], 2), -1, np.int64)
+    for i in range(alt_2d.shape[0]):
+        for j in range(alt_2d.shape[1]):
+            if out[i, 0] < 0:
+                if alt_2d[i, j] > 0:
+                    out[i, 0] = j
+            elif alt_2d[i, j] < 0:
+                out[i, 1] = j
+                break
+    return out
+
+
+def warm_up():
+    # Load (or compile, on a cold cache) every kernel before the first request
+    jd = np.array([J2000_JD])
+    altitudes_over_day(0.0, 0.0, jd)
+    positions(0.0, 0.0, jd)
+    detect_crossings(np.zeros((1, 1)))
@@ -0,0 +1,61 @@
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+import pytz
+
+import app
+from solar_kernels import detect_crossings
+
+
+def brute_force_sunrise_sunset(lat, lon, day, tz):
+    # Every minute of the local day through the same crossing rule
+    midnight_utc = tz.localize(datetime.combine(day, datetime.min.time())).astimezone(timezone.utc)
+    jd0 = np.array([midnight_utc.timestamp()]) / 86400.0 + app.UNIX_EPOCH_JD
+    rise, set_ = detect_crossings(app._day_altitudes(lat, lon, jd0, np.arange(1440)))[0]
+    sunrise = (midnight_utc + timedelta(minutes=int(rise))).astimezone(tz) if rise >= 0 else None
+    sunset = (midnight_utc + timedelta(minutes=int(set_))).astimezone(tz) if set_ >= 0 else None
+    return sunrise, sunset
+
+
+@pytest.mark.parametrize("lat, lon, day, zone", [
+    # polar day and polar night
+    (69.6492, 18.9553, date(2025, 6, 20), "Europe/Oslo"),
+    (69.6492, 18.9553, date(2025, 12, 21), "Europe/Oslo"),
+    # DST transitions
+    (46.6021, -120.5059, date(2025, 3, 9), "America/Los_Angeles"),
+    (46.6021, -120.5059, date(2025, 11, 2), "America/Los_Angeles"),
+    (-31.5553, 159.0821, date(2025, 10, 5), "Australia/Lord_Howe"),
+])
+def test_sunrise_sunset_edge_cases(lat, lon, day, zone):
+    tz = pytz.timezone(zone)
+    assert app.find_sunrise_sunset(lat, lon, [day], tz) == [brute_force_sunrise_sunset(lat, lon, day, tz)]
+
+
+def test_sunrise_sunset_matches_per_minute_scan():
+    rng = np.random.default_rng(0)
+    lats = rng.uniform(-65, 65, 400)
+    lons = rng.uniform(-180, 180, 400)
+    days = [date(2025, 1, 1) + timedelta(days=int(d)) for d in rng.integers(0, 365, 400)]
+    for lat, lon, day in zip(lats, lons, days):
+        assert app.find_sunrise_sunset(lat, lon, [day], pytz.utc) == [brute_force_sunrise_sunset(lat, lon, day, pytz.utc)]
+
+
+@pytest.mark.parametrize("lat, lon, day, zone", [
+    (46.6021, -120.5059, date(2025, 3, 9), "America/Los_Angeles"),
+    (46.6021, -120.5059, date(2025, 11, 2), "America/Los_Angeles"),
+    # 30-minute DST gap and overlap
+    (-31.5553, 159.0821, date(2025, 10, 5), "Australia/Lord_Howe"),
+    (-31.5553, 159.0821, date(2025, 4, 6), "Australia/Lord_Howe"),
+])
+def test_yesterday_series_matches_per_sample_localize(monkeypatch, lat, lon, day, zone):
+    tz = pytz.timezone(zone)
+    monkeypatch.setattr(app, "get_local_timezone", lambda lat, lon: tz)
+    times, altitudes = app.yesterday_series.uncached(lat, lon, day)
+
+    wall_times = [datetime.combine(day, datetime.min.time()) + timedelta(minutes=15 * i) for i in range(96)]
+    expected_utc = np.array(
+        [tz.localize(t).astimezone(timezone.utc).replace(tzinfo=None) for t in wall_times], dtype="datetime64[s]"
+    )
+    assert times == tuple(t.strftime("%Y-%m-%dT%H:%M") for t in wall_times)
+    np.testing.assert_allclose(altitudes, app.solar_altitudes(lat, lon, expected_utc), atol=1e-9)
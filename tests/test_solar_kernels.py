@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+# Reference SPA implementation; listed in requirements-dev.txt
+from pysolar import solar as pysolar
+
+from solar_kernels import UNIX_EPOCH_JD, altitudes_over_day, positions
+
+# Yakima, Tokyo, Nairobi, Tromsø and Sydney at a few times across 2025
+SITES = [(46.6021, -120.5059), (35.6764, 139.6500), (-1.2921, 36.8219), (69.6492, 18.9553), (-33.8688, 151.2093)]
+TIMES = [
+    datetime(2025, 3, 20, 19, 0, tzinfo=timezone.utc),
+    datetime(2025, 6, 20, 3, 30, tzinfo=timezone.utc),
+    datetime(2025, 9, 22, 10, 15, tzinfo=timezone.utc),
+    datetime(2025, 12, 21, 23, 45, tzinfo=timezone.utc),
+]
+
+
+def julian_days(times):
+    return np.array([t.timestamp() for t in times]) / 86400.0 + UNIX_EPOCH_JD
+
+
+@pytest.mark.parametrize("lat, lon", SITES)
+def test_positions_match_pysolar(lat, lon):
+    azimuths, altitudes = positions(lat, lon, julian_days(TIMES))
+    for t, azimuth, altitude in zip(TIMES, azimuths, altitudes):
+        assert altitude == pytest.approx(pysolar.get_altitude(lat, lon, t), abs=0.02)
+        assert azimuth == pytest.approx(pysolar.get_azimuth(lat, lon, t), abs=0.1)
+
+
+@pytest.mark.parametrize("lat, lon, midnight_utc", [
+    (46.6021, -120.5059, datetime(2025, 9, 22, 7, tzinfo=timezone.utc)),
+    (35.6764, 139.6500, datetime(2025, 6, 19, 15, tzinfo=timezone.utc)),
+])
+def test_sunrise_minute_within_one_of_pysolar(lat, lon, midnight_utc):
+    # The simplified model can move a crossing that sits near a minute
+    # boundary by one minute, never more
+    minutes = [midnight_utc + timedelta(minutes=m) for m in range(720)]
+    sunrise = np.argmax(altitudes_over_day(lat, lon, julian_days(minutes)) > 0)
+    expected = next(m for m, t in enumerate(minutes) if pysolar.get_altitude(lat, lon, t) > 0)
+    assert abs(sunrise - expected) <= 1